@@ -0,0 +1,187 @@
+# Headless batch runner: plays many seeded games in parallel across CPU cores,
+# each driven by a policy instead of the keyboard, and reports the score
+# distribution, simulation throughput and which lane types kill the player.
+#
+#   python crossy_batch.py --episodes 2000 --environment VILLAGE --policy forward
+#   python crossy_batch.py --environment CITY --weights ROAD=50,TRAIN=20,SAFE=30
+#   python crossy_batch.py --policy my_bots:careful_policy --json results.json
+#
+# A policy is any callable policy(world, rng) returning one of MOVES, where
+# rng is a random.Random private to the episode. Custom policies are given as
+# module:function and must be importable by the worker processes.
+import argparse
+import importlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from crossy_core import *
+
+DEFAULT_MAX_STEPS = FPS * 60 * 10  # ten minutes of play
+
+# Character paired with each environment in the menu
+DEFAULT_CHARACTERS = {
+    Environment.CITY: Character.CHICKEN,
+    Environment.TECH: Character.ANDROID,
+    Environment.VILLAGE: Character.BRITISH_GUARD,
+    Environment.SNOW: Character.SNOWMAN,
+}
+
+def random_policy(world, rng):
+    return rng.choice(MOVES)
+
+def forward_policy(world, rng):
+    # Mostly hop forward, with some waiting and sidestepping
+    return rng.choices(MOVES, weights=[10, 60, 5, 12, 12])[0]
+
+POLICIES = {
+    "random": random_policy,
+    "forward": forward_policy,
+}
+
+def load_policy(name):
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+def run_episode(task):
+    seed, character, environment, policy_name, max_steps, lane_weights = task
+    policy = load_policy(policy_name)
+    world = World(character, environment, seed=seed, lane_weights=lane_weights)
+    rng = random.Random(seed)
+    
+    steps = 0
+    start = time.perf_counter()
+    while not world.game_over and steps < max_steps:
+        world.step(policy(world, rng))
+        steps += 1
+    
+    return {
+        "seed": seed,
+        "score": world.score,
+        "steps": steps,
+        "seconds": time.perf_counter() - start,
+        "death_cause": world.death_cause.name if world.death_cause else None,
+    }
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(results, wall_time):
+    scores = sorted(result["score"] for result in results)
+    total_steps = sum(result["steps"] for result in results)
+    cpu_time = sum(result["seconds"] for result in results)
+    mean = sum(scores) / len(scores)
+    
+    return {
+        "episodes": len(results),
+        "score": {
+            "mean": mean,
+            "stdev": (sum((score - mean) ** 2 for score in scores) / len(scores)) ** 0.5,
+            "min": scores[0],
+            "p10": percentile(scores, 10),
+            "median": percentile(scores, 50),
+            "p90": percentile(scores, 90),
+            "max": scores[-1],
+        },
+        "score_histogram": dict(sorted(Counter(score // 10 * 10 for score in scores).items())),
+        "steps": total_steps,
+        "wall_seconds": wall_time,
+        "steps_per_second": total_steps / wall_time if wall_time else 0.0,
+        "steps_per_second_per_worker": total_steps / cpu_time if cpu_time else 0.0,
+        "death_causes": dict(Counter(result["death_cause"] or "SURVIVED" for result in results).most_common()),
+    }
+
+def print_report(summary, out=sys.stdout):
+    score = summary["score"]
+    print(f"Episodes: {summary['episodes']}", file=out)
+    print(f"Score: mean {score['mean']:.2f}  stdev {score['stdev']:.2f}  min {score['min']}  "
+          f"p10 {score['p10']}  median {score['median']}  p90 {score['p90']}  max {score['max']}", file=out)
+    print("Score histogram:", file=out)
+    largest = max(summary["score_histogram"].values())
+    for bucket, count in summary["score_histogram"].items():
+        bar = "#" * max(1, count * 40 // largest)
+        print(f"  {bucket:>4}-{bucket + 9:<4} {count:>6}  {bar}", file=out)
+    print(f"Throughput: {summary['steps_per_second']:,.0f} steps/s total, "
+          f"{summary['steps_per_second_per_worker']:,.0f} steps/s per worker "
+          f"({summary['steps']:,} steps in {summary['wall_seconds']:.2f}s)", file=out)
+    print("Death causes:", file=out)
+    for cause, count in summary["death_causes"].items():
+        print(f"  {cause:<10} {count:>6}  {count / summary['episodes']:6.1%}", file=out)
+
+def parse_weights(text):
+    # "ROAD=60,TRAIN=10,SAFE=30" -> {LaneType.ROAD: 60, ...}
+    names = ", ".join(lane_type.name for lane_type in LaneType)
+    weights = {}
+    for item in text.split(","):
+        name, _, value = item.partition("=")
+        name = name.strip().upper()
+        if name not in LaneType.__members__:
+            raise argparse.ArgumentTypeError(f"unknown lane type {name!r}, expected one of {names}")
+        try:
+            weight = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected {name}=<weight>, got {item.strip()!r}") from None
+        if not math.isfinite(weight) or weight < 0:
+            raise argparse.ArgumentTypeError(f"weight of {name} must be finite and at least 0, got {value.strip()!r}")
+        weights[LaneType[name]] = weight
+    if sum(weights.values()) <= 0:
+        raise argparse.ArgumentTypeError(f"weights must not all be 0, got {text!r}")
+    return weights
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Crossy Road games in parallel.")
+    parser.add_argument("--episodes", type=positive_int, default=1000)
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count())
+    parser.add_argument("--environment", choices=[env.name for env in Environment], default="CITY")
+    parser.add_argument("--character", choices=[char.name for char in Character],
+                        help="defaults to the environment's menu character")
+    parser.add_argument("--policy", default="forward",
+                        help="built-in policy (%s) or module:function" % ", ".join(POLICIES))
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS)
+    parser.add_argument("--weights", type=parse_weights,
+                        help="lane type weights for the environment, e.g. ROAD=60,TRAIN=10,SAFE=30")
+    parser.add_argument("--json", metavar="PATH", help="also write the summary and episodes as JSON ('-' for stdout)")
+    args = parser.parse_args(argv)
+    
+    environment = Environment[args.environment]
+    character = Character[args.character] if args.character else DEFAULT_CHARACTERS[environment]
+    load_policy(args.policy)  # fail early on a bad policy name
+    lane_weights = LANE_WEIGHTS
+    if args.weights:
+        lane_weights = dict(LANE_WEIGHTS)
+        lane_weights[environment] = args.weights
+    
+    tasks = [(args.seed + i, character, environment, args.policy, args.max_steps, lane_weights)
+             for i in range(args.episodes)]
+    start = time.perf_counter()
+    with Pool(args.workers) as pool:
+        results = pool.map(run_episode, tasks, chunksize=max(1, len(tasks) // (args.workers * 8)))
+    summary = summarize(results, time.perf_counter() - start)
+    
+    print_report(summary, sys.stderr if args.json == "-" else sys.stdout)
+    if args.json:
+        data = json.dumps({"summary": summary, "episodes": results}, indent=2)
+        if args.json == "-":
+            print(data)
+        else:
+            with open(args.json, "w") as f:
+                f.write(data)
+
+if __name__ == "__main__":
+    main()
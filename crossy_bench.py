@@ -0,0 +1,251 @@
+# Benchmark suite: drives seeded worlds with a scripted input sequence and
+# measures simulation and rendering throughput, lane generation cost per
+# environment, the cost of the crossing check on new sections and memory
+# growth with distance travelled.
+#
+#   python crossy_bench.py --json baseline.json
+#   python crossy_bench.py --baseline baseline.json --tolerance 10
+#
+# With --baseline, every metric is compared against the saved results and the
+# exit status is 1 if any got worse by more than the tolerance (percent).
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from crossy_core import *
+
+# Inputs replayed one per tick; moves are ignored while the player is mid-hop
+SCRIPT = (UP, None, None, UP, LEFT, UP, None, RIGHT, UP, None, DOWN, UP)
+
+# Whether larger values of each metric are better
+HIGHER_IS_BETTER = {
+    "logic_ticks_per_second": True,
+    "render_ticks_per_second": True,
+    "lane_generation_us": False,
+    "lane_spawn_us": False,
+    "section_check_us": False,
+    "memory_growth_kib": False,
+}
+
+def make_engine(vector):
+    if vector:
+        from crossy_vector import VectorEngine
+        return VectorEngine()
+    return None
+
+def bench_logic(ticks, seed, vector=False):
+    # Ticks per second of World.step alone, starting a new seeded game on death
+    world = World(seed=seed, engine=make_engine(vector))
+    games = 1
+    start = time.perf_counter()
+    for tick in range(ticks):
+        world.step(SCRIPT[tick % len(SCRIPT)])
+        if world.game_over:
+            world.init_game(seed + games)
+            games += 1
+    return ticks / (time.perf_counter() - start)
+
+def load_game(headless=True):
+    # The game script's file name is not importable as a module name
+    if headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    spec = importlib.util.spec_from_file_location(
+        "crossy_game", os.path.join(os.path.dirname(os.path.abspath(__file__)), "crossy_road-4.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Game
+
+def bench_render(ticks, seed, vector=False):
+    # Ticks per second of Game.step plus drawing and presenting every tick
+    game = load_game()()
+    game.engine = make_engine(vector)
+    game.in_menu = False
+    game.init_game(seed)
+    games = 1
+    start = time.perf_counter()
+    for tick in range(ticks):
+        game.step(SCRIPT[tick % len(SCRIPT)])
+        game.present_game(1.0)
+        if game.game_over:
+            game.init_game(seed + games)
+            games += 1
+    return ticks / (time.perf_counter() - start)
+
+def bench_lanes(lanes, seed):
+    # Microseconds per lane to describe a row (World.make_lane) and to fill
+    # it in (World.spawn_lane), per environment
+    results = {}
+    for environment in Environment:
+        world = World(environment=environment, seed=seed)
+        rows = range(world.lanes.next_row, world.lanes.next_row + lanes)
+        start = time.perf_counter()
+        made = [world.make_lane(row) for row in rows]
+        described = time.perf_counter()
+        for lane in made:
+            world.spawn_lane(lane)
+        spawned = time.perf_counter()
+        results[environment.name] = {"describe_us": (described - start) / lanes * 1e6,
+                                     "spawn_us": (spawned - described) / lanes * 1e6}
+    return results
+
+def bench_sections(sections, seed):
+    # Microseconds per crossing() of a new section (the first attempt), and
+    # how spread out they are and how many come out uncrossable, per environment
+    results = {}
+    for environment in Environment:
+        world = World(environment=environment, seed=seed, check_sections=False)
+        times = []
+        uncrossable = 0
+        for section in range(1, sections + 1):
+            first = section * SAFE_EVERY + 1
+            lanes = [world.make_lane(row) for row in range(first, first + SAFE_EVERY - 1)]
+            for lane in lanes:
+                lane.spawn()
+            start = time.perf_counter()
+            uncrossable += crossing(lanes, world.tick) <= len(lanes)
+            times.append((time.perf_counter() - start) * 1e6)
+        times.sort()
+        results[environment.name] = {
+            "mean_us": sum(times) / sections,
+            "p99_us": times[sections * 99 // 100],
+            "max_us": times[-1],
+            "uncrossable": uncrossable / sections,
+        }
+    return results
+
+def bench_memory(distance, seed, sample_every=100):
+    # Traced heap size while hopping straight ahead for distance rows; the
+    # player is never stopped by dying, so every run covers the same rows
+    tracemalloc.start()
+    try:
+        world = World(seed=seed)
+        baseline = tracemalloc.get_traced_memory()[0]
+        samples = []
+        next_sample = 0
+        while world.score < distance:
+            world.step(UP)
+            if world.score >= next_sample:
+                samples.append({"rows": world.score, "lanes": len(world.lanes),
+                                "kib": (tracemalloc.get_traced_memory()[0] - baseline) / 1024})
+                next_sample += sample_every
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return samples, (peak - baseline) / 1024
+
+def run(args):
+    best = max  # best of the repeats, the least disturbed by other load
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "vector": args.vector,
+            "ticks": args.ticks,
+            "render_ticks": args.render_ticks,
+            "lanes": args.lanes,
+            "distance": args.distance,
+        },
+        "metrics": {},
+    }
+    metrics = results["metrics"]
+    results["meta"]["sections"] = args.sections
+    metrics["logic_ticks_per_second"] = best(bench_logic(args.ticks, args.seed, args.vector)
+                                             for _ in range(args.repeat))
+    if args.render_ticks:
+        metrics["render_ticks_per_second"] = best(bench_render(args.render_ticks, args.seed, args.vector)
+                                                  for _ in range(args.repeat))
+    lane_runs = [bench_lanes(args.lanes, args.seed) for _ in range(args.repeat)]
+    for environment in Environment:
+        runs = [run[environment.name] for run in lane_runs]
+        metrics["lane_generation_us." + environment.name] = min(run["describe_us"] + run["spawn_us"] for run in runs)
+        metrics["lane_spawn_us." + environment.name] = min(run["spawn_us"] for run in runs)
+    section_runs = [bench_sections(args.sections, args.seed) for _ in range(args.repeat)]
+    results["sections"] = {}
+    for environment in Environment:
+        fastest = min((run[environment.name] for run in section_runs), key=lambda run: run["mean_us"])
+        metrics["section_check_us." + environment.name] = fastest["mean_us"]
+        results["sections"][environment.name] = fastest
+    samples, peak = bench_memory(args.distance, args.seed)
+    metrics["memory_growth_kib"] = samples[-1]["kib"]
+    results["memory_samples"] = samples
+    results["memory_peak_kib"] = peak
+    return results
+
+def higher_is_better(metric):
+    return HIGHER_IS_BETTER[metric.partition(".")[0]]
+
+def compare(results, baseline, tolerance, out=sys.stdout):
+    # Print the change of every metric against the baseline; returns the
+    # names of metrics that regressed by more than tolerance percent
+    regressions = []
+    print(f"{'metric':<32} {'baseline':>12} {'current':>12} {'change':>9}", file=out)
+    for metric, value in results["metrics"].items():
+        old = baseline["metrics"].get(metric)
+        if old is None:
+            print(f"{metric:<32} {'-':>12} {value:>12.2f}", file=out)
+            continue
+        change = (value - old) / old * 100 if old else 0.0
+        worse = -change if higher_is_better(metric) else change
+        flag = ""
+        if worse > tolerance:
+            regressions.append(metric)
+            flag = "  REGRESSION"
+        print(f"{metric:<32} {old:>12.2f} {value:>12.2f} {change:>+8.1f}%{flag}", file=out)
+    return regressions
+
+def print_report(results, out=sys.stdout):
+    for metric, value in results["metrics"].items():
+        print(f"{metric:<32} {value:>12.2f}", file=out)
+    print(f"{'memory_peak_kib':<32} {results['memory_peak_kib']:>12.2f}", file=out)
+    for environment, section in results["sections"].items():
+        print(f"sections {environment:<23} p99 {section['p99_us']:.0f} us, max {section['max_us']:.0f} us, "
+              f"{section['uncrossable']:.1%} uncrossable", file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Crossy Road simulation and rendering.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=20000, help="logic-only ticks per run")
+    parser.add_argument("--render-ticks", type=int, default=2000,
+                        help="ticks per run with drawing on a dummy display, 0 to skip")
+    parser.add_argument("--lanes", type=int, default=2000, help="lanes generated per environment")
+    parser.add_argument("--sections", type=int, default=500, help="sections checked per environment")
+    parser.add_argument("--distance", type=int, default=2000, help="rows travelled for the memory run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the best is kept")
+    parser.add_argument("--vector", action="store_true", help="update entities with crossy_vector.VectorEngine")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON ('-' for stdout)")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=10.0,
+                        help="percent a metric may get worse before it counts as a regression")
+    args = parser.parse_args(argv)
+    
+    results = run(args)
+    out = sys.stderr if args.json == "-" else sys.stdout
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, out)
+    else:
+        print_report(results, out)
+    
+    if args.json:
+        data = json.dumps(results, indent=2)
+        if args.json == "-":
+            print(data)
+        else:
+            with open(args.json, "w") as f:
+                f.write(data)
+    
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:g}%: "
+              + ", ".join(regressions), file=out)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1024 @@
+# Headless simulation core: world, lanes, entities, player, collisions and
+# scoring. Nothing here imports pygame, so worlds can be stepped without a
+# display; crossy_render.py draws them.
+import heapq
+import math
+import random
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from enum import Enum
+from itertools import accumulate
+from operator import attrgetter
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+GRID_SIZE = 40
+FPS = 60  # simulation ticks per second
+
+# Lane rows: row 0 is the starting row, rows count upward (towards negative y)
+ORIGIN_Y = SCREEN_HEIGHT - 100
+LANES_BEHIND = SCREEN_HEIGHT // GRID_SIZE  # rows kept below the bottom of the screen
+LANES_AHEAD = SCREEN_HEIGHT * 2 // GRID_SIZE  # rows kept above the top of the screen
+ACTIVE_MARGIN = 300  # lanes within this many pixels of the screen have objects (trains draw up to 300 off screen)
+SAFE_EVERY = 5  # every fifth row is safe; the rows between are a section
+
+# Crossing search run on every new section (see crossing())
+HOP_TICKS = 10  # ticks a hop takes, Player.hop_animation
+CROSSING_HORIZON = FPS * 10  # ticks a crossing may take
+CROSSING_BUDGET = 400  # states expanded before a section counts as uncrossable
+SECTION_ATTEMPTS = 3  # times an uncrossable section is regenerated before rows are made safe
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREEN = (34, 139, 34)
+DARK_GREEN = (0, 100, 0)
+GRAY = (128, 128, 128)
+DARK_GRAY = (64, 64, 64)
+BLUE = (65, 105, 225)
+DARK_BLUE = (25, 25, 112)
+BROWN = (139, 69, 19)
+YELLOW = (255, 215, 0)
+RED = (220, 20, 60)
+ORANGE = (255, 140, 0)
+PURPLE = (147, 112, 219)
+SNOW_WHITE = (240, 248, 255)
+ICE_BLUE = (176, 224, 230)
+LIGHT_GRAY = (211, 211, 211)
+VILLAGE_GREEN = (107, 142, 35)
+SKY_BLUE = (135, 206, 235)
+
+# Player moves as (dx, dy) grid steps
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+MOVES = (None, UP, DOWN, LEFT, RIGHT)
+
+class LaneType(Enum):
+    SAFE = 0
+    ROAD = 1
+    RIVER = 2
+    TRAIN = 3
+    DANGER = 4
+
+class Character(Enum):
+    CHICKEN = 0
+    ANDROID = 1
+    BRITISH_GUARD = 2
+    SNOWMAN = 3
+
+class Environment(Enum):
+    CITY = 0
+    VILLAGE = 1
+    SNOW = 2
+    TECH = 3
+
+class Rect:
+    # Integer rectangle with the same overlap rule as pygame.Rect.colliderect
+    __slots__ = ("x", "y", "width", "height")
+    
+    def __init__(self, x, y, width, height):
+        self.x = int(x)
+        self.y = int(y)
+        self.width = int(width)
+        self.height = int(height)
+    
+    def colliderect(self, other):
+        return (self.width > 0 and self.height > 0 and other.width > 0 and other.height > 0 and
+                self.x < other.x + other.width and other.x < self.x + self.width and
+                self.y < other.y + other.height and other.y < self.y + self.height)
+
+class GameObject:
+    # Slotted: long runs and parallel simulations keep many thousands alive
+    __slots__ = ("x", "y", "width", "height", "speed", "direction", "rect_width")
+    
+    def __init__(self, x, y, width, height, speed=0, direction=1):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.speed = speed
+        self.direction = direction
+        self.rect_width = int(width)  # collision width, fixed at construction
+    
+    @property
+    def rect(self):
+        # The float position is the only stored position; the collision
+        # rect is derived from it when needed
+        return Rect(self.x, self.y, self.rect_width, self.height)
+    
+    def update(self):
+        # Returns whether the object wrapped around
+        self.x += self.speed * self.direction
+        # Wrap around screen
+        if self.direction > 0 and self.x > SCREEN_WIDTH:
+            self.x = -self.width
+            return True
+        elif self.direction < 0 and self.x < -self.width:
+            self.x = SCREEN_WIDTH
+            return True
+        return False
+    
+    def x_after(self, ticks):
+        # Position after ticks calls to update(), in constant time: each wrap
+        # restarts the object exactly at the opposite edge, so after the
+        # first wrap the motion repeats every period ticks
+        step = self.speed * abs(self.direction)
+        if ticks <= 0 or step <= 0:
+            return self.x
+        period = int((SCREEN_WIDTH + self.width) // step) + 1
+        if self.direction > 0:
+            first = max(1, int((SCREEN_WIDTH - self.x) // step) + 1)  # ticks until the first wrap
+            if ticks < first:
+                return self.x + step * ticks
+            return -self.width + step * ((ticks - first) % period)
+        else:
+            first = max(1, int((self.x + self.width) // step) + 1)
+            if ticks < first:
+                return self.x - step * ticks
+            return SCREEN_WIDTH - step * ((ticks - first) % period)
+    
+    def fast_forward(self, ticks):
+        self.x = self.x_after(ticks)
+    
+    def ticks_to_wrap(self, x):
+        # Updates from position x before the next one wraps it around
+        step = self.speed * abs(self.direction)
+        if step <= 0:
+            return math.inf
+        if self.direction > 0:
+            return max(0, int((SCREEN_WIDTH - x) // step))
+        return max(0, int((x + self.width) // step))
+    
+    def sweep(self, x, ticks):
+        # Intervals [lo, hi) the collision rect covers from position x over
+        # the next ticks updates: one, or two if it wraps on the way (ticks
+        # must be less than a period)
+        step = self.speed * abs(self.direction)
+        before = min(ticks, self.ticks_to_wrap(x))
+        if self.direction > 0:
+            spans = [(x, x + step * before + self.rect_width)]
+            if ticks > before:
+                spans.append((-self.width, -self.width + step * (ticks - before - 1) + self.rect_width))
+        else:
+            spans = [(x - step * before, x + self.rect_width)]
+            if ticks > before:
+                spans.append((SCREEN_WIDTH - step * (ticks - before - 1), SCREEN_WIDTH + self.rect_width))
+        return spans
+
+OBJECT_X = attrgetter("x")
+
+def rect_left(obj):
+    return int(obj.x)
+
+class Car(GameObject):
+    __slots__ = ("color", "car_type")
+    
+    def __init__(self, x, y, speed, direction, color, car_type="car"):
+        super().__init__(x, y, GRID_SIZE * 2, GRID_SIZE - 10, speed, direction)
+        self.color = color
+        self.car_type = car_type
+
+class Log(GameObject):
+    __slots__ = ()
+    
+    def __init__(self, x, y, width, speed, direction):
+        super().__init__(x, y, width, GRID_SIZE - 10, speed, direction)
+
+class Train(GameObject):
+    __slots__ = ("warning_time", "active")
+    
+    def __init__(self, x, y, speed, direction):
+        super().__init__(x, y, GRID_SIZE * 6, GRID_SIZE - 5, speed, direction)
+        self.warning_time = 120  # 2 seconds warning
+        self.active = False
+
+class Enemy(GameObject):
+    __slots__ = ("enemy_type",)
+    
+    def __init__(self, x, y, speed, direction, enemy_type="robot"):
+        super().__init__(x, y, GRID_SIZE - 5, GRID_SIZE - 5, speed, direction)
+        self.enemy_type = enemy_type
+
+def place_in_slots(rng, widths, min_gap):
+    # Left edges for objects laid out left to right in one pass. Neighbours are
+    # at least (w1 + w2) / 2 + min_gap apart, the spawn spacing rule, and the
+    # leftover lane width is split randomly between the gaps. If the objects
+    # cannot fit, the gaps shrink evenly so none are dropped.
+    spacings = [math.ceil((a + b) / 2 + min_gap) for a, b in zip(widths, widths[1:])]
+    slack = SCREEN_WIDTH - sum(spacings) - widths[-1]
+    if slack < 0:
+        shrink = -slack // len(spacings) + 1
+        spacings = [max(spacing - shrink, 0) for spacing in spacings]
+        slack = max(SCREEN_WIDTH - sum(spacings) - widths[-1], 0)
+    
+    cuts = sorted(rng.randint(0, slack) for i in range(len(widths)))
+    positions = []
+    x = cuts[0]
+    for i, cut in enumerate(cuts):
+        if i > 0:
+            x += spacings[i - 1] + cut - cuts[i - 1]
+        positions.append(x)
+    return positions
+
+class Lane:
+    # A lane starts as a descriptor (y, type, seed) with no objects; spawn()
+    # fills it in once the lane comes near the screen
+    __slots__ = ("y", "seed", "tick", "spawned", "rng", "lane_type", "environment", "objects",
+                 "warning_timer", "train_cooldown", "index", "max_width", "overtaking")
+    
+    def __init__(self, y, lane_type, environment, seed=None, tick=0):
+        self.y = y
+        self.seed = seed  # seed of the row's RNG stream
+        self.tick = tick  # world tick the objects' positions correspond to
+        self.spawned = False
+        self.rng = None  # this lane's own stream, once spawned
+        self.lane_type = lane_type
+        self.environment = environment
+        self.objects = []
+        self.warning_timer = 0
+        self.train_cooldown = 0
+        self.index = []
+        self.max_width = 0
+        self.overtaking = False
+    
+    def spawn(self):
+        self.rng = random.Random(self.seed)
+        self.spawned = True
+        
+        if self.lane_type == LaneType.ROAD:
+            self._spawn_cars()
+        elif self.lane_type == LaneType.RIVER:
+            self._spawn_logs()
+        elif self.lane_type == LaneType.TRAIN:
+            self._setup_train()
+        elif self.lane_type == LaneType.DANGER:
+            self._spawn_enemies()
+        
+        # Broadphase index: objects sorted by x. Objects moving at the same
+        # speed keep their order until one wraps; buses are slower than the
+        # cars in their lane, so a lane with both is sorted when it is queried
+        self.index = list(self.objects)
+        self.max_width = max((obj.rect_width for obj in self.objects), default=0)
+        self.overtaking = len({obj.speed for obj in self.objects}) > 1
+        self.reindex()
+    
+    def despawn(self):
+        # Back to a bare descriptor, as when restoring a snapshot taken
+        # before the lane spawned
+        self.spawned = False
+        self.rng = None
+        self.objects = []
+        self.warning_timer = 0
+        self.train_cooldown = 0
+        self.index = []
+        self.max_width = 0
+        self.overtaking = False
+    
+    def _spawn_cars(self):
+        num_cars = self.rng.randint(2, 4)
+        speed = self.rng.uniform(1.5, 3.5)
+        direction = self.rng.choice([-1, 1])
+        
+        colors = [RED, BLUE, YELLOW, ORANGE, PURPLE]
+        min_gap = GRID_SIZE * 3  # Minimum gap between cars
+        
+        car_types = ["bus" if self.rng.random() < 0.2 else "car" for i in range(num_cars)]
+        widths = [GRID_SIZE * 3 if car_type == "bus" else GRID_SIZE * 2 for car_type in car_types]
+        
+        for x, car_type in zip(place_in_slots(self.rng, widths, min_gap), car_types):
+            color = self.rng.choice(colors)
+            
+            if car_type == "bus":
+                car = Car(x, self.y, speed * 0.7, direction, color, car_type)
+                car.width = GRID_SIZE * 3
+            else:
+                car = Car(x, self.y, speed, direction, color, car_type)
+            
+            self.objects.append(car)
+    
+    def _spawn_logs(self):
+        num_logs = self.rng.randint(2, 4)
+        speed = self.rng.uniform(0.8, 2.0)
+        direction = self.rng.choice([-1, 1])
+        
+        min_gap = GRID_SIZE  # Minimum gap between logs
+        widths = [self.rng.randint(GRID_SIZE * 2, GRID_SIZE * 4) for i in range(num_logs)]
+        
+        for x, width in zip(place_in_slots(self.rng, widths, min_gap), widths):
+            log = Log(x, self.y, width, speed, direction)
+            self.objects.append(log)
+    
+    def _setup_train(self):
+        # Train starts off-screen
+        direction = self.rng.choice([-1, 1])
+        x = -GRID_SIZE * 6 if direction > 0 else SCREEN_WIDTH
+        train = Train(x, self.y, 8, direction)
+        self.objects.append(train)
+        self.train_cooldown = self.rng.randint(180, 360)  # 3-6 seconds
+    
+    def _spawn_enemies(self):
+        num_enemies = self.rng.randint(3, 5)
+        speed = self.rng.uniform(1.0, 2.5)
+        direction = self.rng.choice([-1, 1])
+        
+        enemy_type = "alien" if self.environment == Environment.TECH else "robot"
+        enemy_width = GRID_SIZE - 5
+        min_gap = GRID_SIZE * 1.5  # Minimum gap between enemies
+        
+        for x in place_in_slots(self.rng, [enemy_width] * num_enemies, min_gap):
+            enemy = Enemy(x, self.y, speed, direction, enemy_type)
+            self.objects.append(enemy)
+    
+    def update(self):
+        wrapped = None
+        for obj in self.objects:
+            if isinstance(obj, Train):
+                if self.train_cooldown > 0:
+                    self.train_cooldown -= 1
+                    obj.active = False
+                    # Reset train position
+                    if obj.direction > 0:
+                        obj.x = -obj.width
+                    else:
+                        obj.x = SCREEN_WIDTH
+                elif self.train_cooldown == 0:
+                    obj.active = True
+                    obj.update()
+                    # Check if train has passed
+                    if (obj.direction > 0 and obj.x > SCREEN_WIDTH + 100) or \
+                       (obj.direction < 0 and obj.x < -obj.width - 100):
+                        self.train_cooldown = self.rng.randint(180, 360)
+            elif obj.update():
+                wrapped = wrapped or []
+                wrapped.append(obj)
+        
+        # An object that wrapped moves to its place at the other end of the index
+        if wrapped and not self.overtaking:
+            for obj in wrapped:
+                self.index.remove(obj)
+                insort(self.index, obj, key=OBJECT_X)
+    
+    def advance(self, ticks):
+        # Same state as ticks calls to update(), in time independent of ticks.
+        # A running train wraps before its "passed" check can see it beyond the
+        # edge, so once its cooldown ends it moves like any other object.
+        if ticks == 1:
+            self.update()
+            return
+        if ticks <= 0:
+            return
+        for obj in self.objects:
+            if isinstance(obj, Train):
+                waiting = min(ticks, self.train_cooldown)
+                if waiting:
+                    self.train_cooldown -= waiting
+                    obj.active = False
+                    obj.x = -obj.width if obj.direction > 0 else SCREEN_WIDTH
+                if ticks > waiting:
+                    obj.active = True
+                    obj.fast_forward(ticks - waiting)
+            else:
+                obj.fast_forward(ticks)
+        self.reindex()
+    
+    def reindex(self):
+        # Sort the index after positions changed by more than a tick
+        self.index.sort(key=OBJECT_X)
+    
+    def overlapping(self, rect):
+        # Objects colliding with rect; only those whose left edge is within
+        # max_width to the left of rect are candidates
+        if self.overtaking:
+            self.reindex()
+        lo = bisect_left(self.index, rect.x - self.max_width + 1, key=rect_left)
+        hi = bisect_left(self.index, rect.x + rect.width, key=rect_left)
+        return [obj for obj in self.index[lo:hi] if rect.colliderect(obj.rect)]
+    
+    def hits(self, rect):
+        # Whether rect collides with a hazard; logs are not hazards and
+        # trains only are while they are running
+        if self.lane_type == LaneType.RIVER:
+            return False
+        for obj in self.overlapping(rect):
+            if self.lane_type != LaneType.TRAIN or obj.active:
+                return True
+        return False
+
+def row_seed(seed, row):
+    # splitmix64 mix of the world seed and row index: independent per-row streams
+    z = (seed + (row + 1) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return z ^ (z >> 31)
+
+def row_to_y(row):
+    return ORIGIN_Y - row * GRID_SIZE
+
+def y_to_row(y):
+    return int((ORIGIN_Y - y) // GRID_SIZE)
+
+def nearest_row(y):
+    return round((ORIGIN_Y - y) / GRID_SIZE)
+
+class LaneWindow:
+    # Fixed-capacity window of lanes around the camera, ordered from the
+    # lowest row (behind the player) to the highest row (ahead)
+    def __init__(self, rows_behind=LANES_BEHIND, rows_ahead=LANES_AHEAD):
+        self.rows_behind = rows_behind
+        self.rows_ahead = rows_ahead
+        self.capacity = rows_behind + rows_ahead + SCREEN_HEIGHT // GRID_SIZE + 2
+        self.lanes = deque()
+        self.by_row = {}  # row index -> Lane
+        self.first_row = 0
+        self.next_row = 0
+    
+    def __iter__(self):
+        return iter(self.lanes)
+    
+    def __len__(self):
+        return len(self.lanes)
+    
+    def append(self, lane):
+        if len(self.lanes) == self.capacity:
+            self._pop_oldest()
+        self.lanes.append(lane)
+        self.by_row[self.next_row] = lane
+        self.next_row += 1
+    
+    def prepend(self, lane):
+        # Row first_row - 1 again, after it was evicted; the newest row makes room
+        if len(self.lanes) == self.capacity:
+            self._pop_newest()
+        self.lanes.appendleft(lane)
+        self.first_row -= 1
+        self.by_row[self.first_row] = lane
+    
+    def _pop_oldest(self):
+        self.lanes.popleft()
+        del self.by_row[self.first_row]
+        self.first_row += 1
+    
+    def _pop_newest(self):
+        self.lanes.pop()
+        self.next_row -= 1
+        del self.by_row[self.next_row]
+    
+    def lane_at(self, row):
+        return self.by_row.get(row)
+    
+    def replace(self, row, lane):
+        self.lanes[row - self.first_row] = lane
+        self.by_row[row] = lane
+    
+    def between(self, top_y, bottom_y):
+        # Lanes whose y lies in [top_y, bottom_y], lowest row first
+        first = max(self.first_row, math.ceil((ORIGIN_Y - bottom_y) / GRID_SIZE))
+        last = min(self.next_row - 1, math.floor((ORIGIN_Y - top_y) / GRID_SIZE))
+        return [self.by_row[row] for row in range(first, last + 1)]
+    
+    def lane_at_y(self, y):
+        # Lane whose row is closest to y, if it is within half a cell
+        lane = self.by_row.get(nearest_row(y))
+        if lane and abs(lane.y - y) < GRID_SIZE // 2:
+            return lane
+        return None
+    
+    def needs_row(self, camera_y):
+        # Highest row that should exist: the top of the screen plus the rows ahead
+        return self.next_row <= y_to_row(camera_y) + self.rows_ahead
+    
+    def lowest_row(self, camera_y):
+        # Lowest row kept: rows_behind below the bottom of the screen, but
+        # nothing below the starting row
+        return max(0, y_to_row(camera_y + SCREEN_HEIGHT) - self.rows_behind)
+    
+    def needs_row_behind(self, camera_y):
+        # Whether the camera came back down to rows that were evicted
+        return bool(self.lanes) and self.first_row > self.lowest_row(camera_y)
+    
+    def evict(self, camera_y):
+        # Drop rows that fell further than rows_behind below the bottom of the screen
+        lowest_row = self.lowest_row(camera_y)
+        while self.lanes and self.first_row < lowest_row:
+            self._pop_oldest()
+
+class Player:
+    __slots__ = ("character", "environment", "x", "y", "start_y", "width", "height", "rect", "on_log",
+                 "hop_animation", "hop_direction", "target_x", "target_y", "is_hopping")
+    
+    def __init__(self, character, environment):
+        self.character = character
+        self.environment = environment
+        self.x = SCREEN_WIDTH // 2
+        self.y = SCREEN_HEIGHT - 100
+        self.start_y = self.y
+        self.width = GRID_SIZE - 10
+        self.height = GRID_SIZE - 10
+        self.rect = Rect(self.x, self.y, self.width, self.height)
+        self.on_log = None
+        self.hop_animation = 0
+        self.hop_direction = None
+        self.target_x = self.x
+        self.target_y = self.y
+        self.is_hopping = False
+    
+    def move(self, dx, dy):
+        if not self.is_hopping:
+            self.target_x = self.x + dx * GRID_SIZE
+            self.target_y = self.y + dy * GRID_SIZE
+            self.hop_direction = (dx, dy)
+            self.is_hopping = True
+            self.hop_animation = 10
+    
+    def update(self):
+        if self.is_hopping and self.hop_animation > 0:
+            # Smooth hopping animation
+            progress = (10 - self.hop_animation) / 10
+            self.x = self.x + (self.target_x - self.x) * 0.3
+            self.y = self.y + (self.target_y - self.y) * 0.3
+            self.hop_animation -= 1
+            
+            if self.hop_animation == 0:
+                self.x = self.target_x
+                self.y = self.target_y
+                self.is_hopping = False
+        
+        # Update rect
+        self.rect.x = int(self.x)
+        self.rect.y = int(self.y)
+        
+        # Keep player on screen horizontally
+        if self.x < 0:
+            self.x = 0
+            self.target_x = 0
+        elif self.x > SCREEN_WIDTH - self.width:
+            self.x = SCREEN_WIDTH - self.width
+            self.target_x = SCREEN_WIDTH - self.width
+        
+        # Move with log if on one
+        if self.on_log:
+            self.x += self.on_log.speed * self.on_log.direction
+            self.target_x = self.x
+
+def crossing(lanes, start, horizon=CROSSING_HORIZON, budget=CROSSING_BUDGET):
+    # How far a player setting off at world tick start can get through a
+    # section, the spawned lanes between two safe rows (lowest first):
+    # len(lanes) + 1 if they can cross it, otherwise the number of its rows
+    # they can reach.
+    #
+    # Searches states (row, x, tick) from every column of the safe row below,
+    # earliest arrival first. Row 0 is the safe row below and len(lanes) + 1
+    # the one above. Obstacles are placed in closed form from each lane's
+    # state at its own tick, so no lane is stepped or changed.
+    #
+    # Every move, waiting included, takes HOP_TICKS. A hop between rows is
+    # taken to occupy both for its whole length and a sideways hop its whole
+    # swept width, with a pixel to spare, and sideways hops on logs (which
+    # only shift the player a few pixels) are left out: the search errs
+    # towards calling a crossable section uncrossable, not the reverse.
+    goal = len(lanes) + 1
+    size = GRID_SIZE - 10  # Player.width
+    rivers = [False] + [lane.lane_type == LaneType.RIVER for lane in lanes] + [False]
+    hazards_cache = {}
+    logs_cache = {}
+    
+    def clear(row, lo, hi, tick):
+        # Whether [lo, hi) of row is free of hazards over the hop after tick
+        if row == 0 or row == goal or rivers[row]:
+            return True
+        spans = hazards_cache.get((row, tick))
+        if spans is None:
+            lane = lanes[row - 1]
+            spans = []
+            for obj in lane.objects:
+                first = tick + 1
+                if lane.lane_type == LaneType.TRAIN:
+                    # Trains wait out their cooldown, then run like any object
+                    running = lane.tick + lane.train_cooldown
+                    first = max(first, running + 1)
+                    if first > tick + HOP_TICKS:
+                        continue
+                    x = obj.x_after(first - running)
+                else:
+                    x = obj.x_after(first - lane.tick)
+                spans += obj.sweep(x, tick + HOP_TICKS - first)
+            hazards_cache[row, tick] = spans
+        for a, b in spans:
+            if a - 1 < hi and lo < b + 1:  # a pixel to spare for rounding
+                return False
+        return True
+    
+    def drift(row, left, tick, ticks):
+        # Velocity of a log on river row under a player whose rect is at
+        # left at tick, if it carries them for ticks more without wrapping;
+        # None if there is none. The rect lags the player by a tick's drift.
+        logs = logs_cache.get((row, tick))
+        if logs is None:
+            lane = lanes[row - 1]
+            logs = [(int(log.x_after(tick - lane.tick)), log) for log in lane.objects]
+            logs_cache[row, tick] = logs
+        left = int(left)
+        for log_x, log in logs:
+            if (log_x + 1 < left + size and left + 1 < log_x + log.rect_width and  # a pixel to spare
+                    log.ticks_to_wrap(log_x) >= ticks):
+                return log.speed * log.direction
+        return None
+    
+    def on_screen(x):
+        # Not pushed against an edge, where a log would slide from under them
+        return 0 <= x <= SCREEN_WIDTH - size
+    
+    heap = [(start + goal * HOP_TICKS, 0, start, x) for x in range(0, SCREEN_WIDTH - size + 1, GRID_SIZE)]
+    seen = set()
+    best = 0
+    while heap and len(seen) < budget:
+        _, row, tick, x = heapq.heappop(heap)
+        row = -row
+        key = (row, int(x), tick)
+        if key in seen or tick - start >= horizon:
+            continue
+        seen.add(key)
+        best = max(best, row)
+        after = tick + HOP_TICKS
+        
+        moves = []  # (row, x) after each move that survives
+        targets = ()
+        if rivers[row]:
+            # Riding a log: wait, or hop off it, drifting for the two ticks
+            # until the player counts as in the next row
+            speed = drift(row, x, tick + 1, HOP_TICKS)
+            if speed is not None:
+                if on_screen(x + speed * HOP_TICKS):
+                    moves.append((row, x + speed * HOP_TICKS))
+                x_rect = x + speed
+                x_off = x + speed * 2
+                if on_screen(x_off):
+                    targets = (row + 1, row - 1)
+        elif clear(row, x, x + size, tick):
+            moves.append((row, x))
+            if row > 0:
+                for x_side in (x - GRID_SIZE, x + GRID_SIZE):
+                    if on_screen(x_side) and clear(row, min(x, x_side), max(x, x_side) + size, tick):
+                        moves.append((row, x_side))
+            x_rect = x_off = x
+            targets = (row + 1, row - 1)
+        
+        for target in targets:
+            if target == goal:
+                return goal
+            if target < 0:
+                continue
+            if rivers[target]:
+                # The rect catches up with the new log's drift a tick after landing
+                speed = drift(target, x_rect, tick + 2, HOP_TICKS - 2)
+                if (speed is not None and drift(target, x_off, tick + 3, HOP_TICKS - 3) is not None and
+                        on_screen(x_off + speed * (HOP_TICKS - 2))):
+                    moves.append((target, x_off + speed * (HOP_TICKS - 2)))
+            elif clear(target, min(x, x_off), max(x, x_off) + size, tick):
+                moves.append((target, x_off))
+        
+        for row, x in moves:
+            heapq.heappush(heap, (after + (goal - row) * HOP_TICKS, -row, after, x))
+    return best
+
+# Relative odds of each lane type between the regular safe rows
+LANE_WEIGHTS = {
+    Environment.CITY: {LaneType.ROAD: 60, LaneType.TRAIN: 10, LaneType.SAFE: 30},
+    Environment.VILLAGE: {LaneType.ROAD: 40, LaneType.RIVER: 40, LaneType.SAFE: 20},
+    Environment.SNOW: {LaneType.RIVER: 50, LaneType.SAFE: 30, LaneType.DANGER: 20},
+    Environment.TECH: {LaneType.ROAD: 40, LaneType.DANGER: 40, LaneType.SAFE: 20},
+}
+
+class World:
+    def __init__(self, character=Character.CHICKEN, environment=Environment.CITY, engine=None, seed=None,
+                 lane_weights=LANE_WEIGHTS, active_margin=ACTIVE_MARGIN, check_sections=True):
+        self.character = character
+        self.environment = environment
+        self.lane_weights = lane_weights
+        self.active_margin = active_margin  # lanes this far off screen still have live objects
+        self.check_sections = check_sections  # regenerate sections the player cannot cross
+        self.engine = engine  # batched entity updater such as crossy_vector.VectorEngine
+        self.profiler = None  # crossy_profiler.FrameProfiler timing the phases of each step
+        self.player = None
+        self.lanes = LaneWindow()
+        self.camera_y = 0
+        self.score = 0
+        self.high_score = 0
+        self.game_over = False
+        
+        self.init_game(seed)
+    
+    def init_game(self, seed=None):
+        # Every lane is derived from the seed, so a seed replays the same world
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.player = Player(self.character, self.environment)
+        self.score = 0
+        self.game_over = False
+        self.death_cause = None  # LaneType of the lane the player died on
+        self.tick = 0
+        
+        # Set camera to follow player from the start
+        self.camera_y = self.player.y - SCREEN_HEIGHT * 0.65
+        self.prev_camera_y = self.camera_y
+        self.prev_player_pos = (self.player.x, self.player.y)
+        
+        # Generate initial lanes
+        if self.engine:
+            self.engine.clear()
+        self.lanes = LaneWindow()
+        self.next_section = SAFE_EVERY + 1  # first row of the next section to check
+        self.remade = {}  # row -> (lane type, seed) of rows check_section replaced
+        self.update_lanes()
+    
+    def lane_type(self, row, seed):
+        # Determine lane type based on environment
+        if row < SAFE_EVERY:  # Starting safe zone (large)
+            return LaneType.SAFE
+        elif row % SAFE_EVERY == 0:  # Safe zone every 5 lanes
+            return LaneType.SAFE
+        # Weighted pick from a uniform hashed out of the row's seed, so
+        # describing a row needs no RNG instance
+        weights = self.lane_weights[self.environment]
+        cumulative = list(accumulate(weights.values()))
+        u = (row_seed(seed, 0) >> 11) / (1 << 53)
+        return list(weights)[bisect_right(cumulative, u * cumulative[-1])]
+    
+    def make_lane(self, row, attempt=0):
+        # Describe a row by its type and the seed of its own RNG stream; the
+        # same seed and row always give the same lane, whenever and in
+        # whatever order it is built. Each attempt gives a different lane.
+        # Objects are laid out as at tick 0 and caught up when the lane
+        # spawns, so a row built again after eviction is where it would
+        # have been had it never left.
+        seed = row_seed(self.seed, row)
+        if attempt:
+            seed = row_seed(seed, attempt)
+        return Lane(row_to_y(row), self.lane_type(row, seed), self.environment, seed)
+    
+    def lane_for_row(self, row):
+        # A row as check_section left it, for rows built again after eviction
+        remade = self.remade.get(row)
+        if remade is None:
+            return self.make_lane(row)
+        lane_type, seed = remade
+        return Lane(row_to_y(row), lane_type, self.environment, seed)
+    
+    def check_section(self, row):
+        # Spawn the section starting at row, making sure the player can cross
+        # it from now on: if not, remake its lanes from new seeds, and after
+        # SECTION_ATTEMPTS make rows of the last attempt safe one at a time
+        # until they can
+        rows = range(row, row + SAFE_EVERY - 1)
+        lanes = [self.lanes.lane_at(r) for r in rows]
+        attempt = 0
+        while True:
+            for lane in lanes:
+                if not lane.spawned:
+                    self.spawn_lane(lane)
+            reached = crossing(lanes, self.tick)
+            if reached > len(lanes):
+                break
+            attempt += 1
+            if attempt <= SECTION_ATTEMPTS:
+                lanes = [self.make_lane(r, attempt) for r in rows]
+            else:
+                # The row they cannot get onto, or if that is safe (or the
+                # safe row above), the one they cannot get off
+                if reached == len(lanes) or lanes[reached].lane_type == LaneType.SAFE:
+                    reached -= 1
+                stuck = lanes[reached]
+                lanes[reached] = Lane(stuck.y, LaneType.SAFE, self.environment, stuck.seed)
+        # A record is never dropped: a row that has one is built from it, so
+        # a section passing as built is passing as remade
+        if attempt:
+            for r, lane in zip(rows, lanes):
+                self.lanes.replace(r, lane)
+                self.remade[r] = (lane.lane_type, lane.seed)
+    
+    def spawn_lane(self, lane):
+        # Objects start where they would be had they moved since the row was made
+        lane.spawn()
+        self.catch_up(lane)
+    
+    def catch_up(self, lane):
+        lane.advance(self.tick - lane.tick)
+        lane.tick = self.tick
+    
+    def active_lanes(self):
+        # Lanes within active_margin of the screen
+        return self.lanes.between(self.camera_y - self.active_margin,
+                                  self.camera_y + SCREEN_HEIGHT + self.active_margin)
+    
+    def generate_lane(self):
+        self.lanes.append(self.lane_for_row(self.lanes.next_row))
+    
+    def update_lanes(self):
+        # Generate each row as it comes into range ahead of the camera
+        while self.lanes.needs_row(self.camera_y):
+            self.generate_lane()
+        
+        # Build evicted rows again when the camera follows the player back
+        # down, and the rows dropped off the top to make room once it goes
+        # up again. Rebuilt rows are the rows that left, so sections already
+        # checked stay checked.
+        while self.lanes.needs_row_behind(self.camera_y):
+            self.lanes.prepend(self.lane_for_row(self.lanes.first_row - 1))
+        
+        # Evict rows that are far behind the camera
+        self.lanes.evict(self.camera_y)
+        
+        # Check sections for a crossing as they come within active_margin of
+        # the screen, before any of their rows would otherwise spawn
+        if self.check_sections:
+            last = min(y_to_row(self.camera_y - self.active_margin), self.lanes.next_row - SAFE_EVERY + 1)
+            while self.next_section <= last:
+                self.check_section(self.next_section)
+                self.next_section += SAFE_EVERY
+        
+        # Spawn rows coming within active_margin of the screen and bring rows
+        # returning to it up to date. Rows the engine has taken over are kept
+        # current by the engine, and when it holds the whole band there is
+        # nothing to do.
+        lanes = self.active_lanes()
+        if self.engine and self.engine.holds_all(lanes):
+            return
+        for lane in lanes:
+            if not lane.spawned:
+                self.spawn_lane(lane)
+            elif not (self.engine and self.engine.holds(lane)):
+                self.catch_up(lane)
+    
+    def check_collisions(self):
+        player_rect = self.player.rect
+        
+        # The rows the player spans; while hopping that is both the row being
+        # left and the row being entered
+        offset = (ORIGIN_Y - self.player.y) / GRID_SIZE
+        rows = {math.floor(offset), math.ceil(offset)}
+        if self.engine:
+            self.engine.sync_lanes([self.lanes.lane_at(row) for row in rows])
+        
+        # Find current lane
+        current_lane = self.lanes.lane_at_y(self.player.y)
+        
+        if not current_lane:
+            return False
+        
+        # Check if on river/water
+        if current_lane.lane_type == LaneType.RIVER:
+            logs = current_lane.overlapping(player_rect)
+            self.player.on_log = logs[0] if logs else None
+            
+            # If not on a log, game over
+            if not self.player.on_log:
+                self.death_cause = current_lane.lane_type
+                return True
+        else:
+            self.player.on_log = None
+        
+        # Check collision with obstacles in the rows the player spans
+        for row in rows:
+            lane = self.lanes.lane_at(row)
+            if lane and lane.hits(player_rect):
+                self.death_cause = lane.lane_type
+                return True
+        
+        return False
+    
+    def update_camera(self):
+        # Camera smoothly follows player, keeping them in view
+        # Target: keep player in the lower third of the screen for better forward visibility
+        target_camera = self.player.y - SCREEN_HEIGHT * 0.65
+        
+        # Smooth camera movement
+        if abs(target_camera - self.camera_y) > 1:
+            self.camera_y += (target_camera - self.camera_y) * 0.1
+        else:
+            self.camera_y = target_camera
+        
+        # Update score based on progress (only when moving forward/up)
+        new_score = int((self.player.start_y - self.player.y) // GRID_SIZE)
+        if new_score > self.score:
+            self.score = new_score
+    
+    def step(self, move=None):
+        # Advance the world by one tick; move is a (dx, dy) grid step or None
+        mark = self.profiler.mark if self.profiler else None
+        if mark:
+            mark("handle_input")
+        self.tick += 1
+        
+        # State before the tick, for interpolated rendering between ticks
+        self.prev_camera_y = self.camera_y
+        self.prev_player_pos = (self.player.x, self.player.y)
+        
+        if move and not self.player.is_hopping:
+            self.player.move(*move)
+        
+        self.player.update()
+        if mark:
+            mark("player.update")
+        
+        if self.engine:
+            self.engine.step(self)
+        else:
+            # Rows away from the screen sleep and catch up when they return
+            for lane in self.active_lanes():
+                if lane.spawned:
+                    self.catch_up(lane)
+        if mark:
+            mark("lanes.update")
+        
+        # Check collisions
+        if self.check_collisions():
+            self.game_over = True
+            if self.score > self.high_score:
+                self.high_score = self.score
+        if mark:
+            mark("check_collisions")
+        
+        # Update camera
+        self.update_camera()
+        if mark:
+            mark("update_camera")
+        
+        # Generate new lanes ahead of player, drop lanes left behind
+        self.update_lanes()
+        if mark:
+            mark("update_lanes")
+    
+    def snapshot(self):
+        # The state step() changes, as flat tuples: restore() puts the world
+        # back exactly, RNG included, so a bot can look ahead and return.
+        # Objects are shared rather than copied; only their positions and
+        # train flags change after spawning, and trains' re-cooldown is the
+        # only use of a lane's RNG afterwards, so only train lanes save its state.
+        if self.engine:
+            self.engine.sync()
+        player = self.player
+        lanes = []
+        for lane in self.lanes.lanes:
+            if not lane.spawned:
+                lanes.append((lane, lane.tick))
+                continue
+            objects = tuple(lane.objects)
+            if lane.lane_type == LaneType.TRAIN:
+                trains = tuple(obj.active for obj in objects)
+                rng_state = lane.rng.getstate()
+            else:
+                trains = rng_state = None
+            lanes.append((lane, lane.tick, objects, tuple(obj.x for obj in objects), trains,
+                          lane.rng, rng_state, lane.train_cooldown, lane.warning_timer,
+                          tuple(lane.index), lane.max_width, lane.overtaking))
+        return ((self.character, self.environment, self.seed, self.tick, self.score, self.game_over,
+                 self.death_cause, self.camera_y, self.prev_camera_y, self.prev_player_pos, self.next_section,
+                 dict(self.remade)),
+                (player.x, player.y, player.start_y, player.target_x, player.target_y, player.hop_animation,
+                 player.hop_direction, player.is_hopping, player.on_log),
+                self.lanes.first_row, tuple(lanes))
+    
+    def restore(self, snapshot):
+        # Back to the state of snapshot(), taken from this world at any time
+        # since it was made; high_score is kept
+        if self.engine:
+            self.engine.invalidate()  # before the objects are rewritten
+        world, player_state, first_row, lanes = snapshot
+        (self.character, self.environment, self.seed, self.tick, self.score, self.game_over,
+         self.death_cause, self.camera_y, self.prev_camera_y, self.prev_player_pos, self.next_section,
+         remade) = world
+        self.remade = dict(remade)
+        
+        player = self.player
+        player.character = self.character
+        player.environment = self.environment
+        (player.x, player.y, player.start_y, player.target_x, player.target_y, player.hop_animation,
+         player.hop_direction, player.is_hopping, player.on_log) = player_state
+        player.rect.x = int(player.x)
+        player.rect.y = int(player.y)
+        
+        window = self.lanes
+        window.lanes = deque(state[0] for state in lanes)
+        window.by_row = dict(zip(range(first_row, first_row + len(lanes)), window.lanes))
+        window.first_row = first_row
+        window.next_row = first_row + len(lanes)
+        for state in lanes:
+            lane = state[0]
+            lane.tick = state[1]
+            if len(state) == 2:
+                if lane.spawned:
+                    lane.despawn()
+                continue
+            (lane, _, objects, xs, trains, lane.rng, rng_state, lane.train_cooldown, lane.warning_timer,
+             index, lane.max_width, lane.overtaking) = state
+            lane.spawned = True
+            lane.objects = list(objects)
+            for obj, x in zip(objects, xs):
+                obj.x = x
+            if trains:
+                for obj, active in zip(objects, trains):
+                    obj.active = active
+                lane.rng.setstate(rng_state)
+            lane.index = list(index)
@@ -0,0 +1,149 @@
+# Batched environment for reinforcement learning: steps K independent worlds
+# in lockstep in one process and returns observations, rewards and done flags
+# as NumPy arrays. Worlds that finish are reset to a new seed straight away,
+# so every call steps all K of them.
+#
+#   env = VectorEnv(64, environment=Environment.VILLAGE, seed=0)
+#   obs = env.reset()
+#   obs, rewards, dones, info = env.step(actions)  # actions: indices into MOVES
+#
+#   python crossy_env.py --worlds 64 --steps 2000
+#
+# The observation of each world is an occupancy grid of OBS_ROWS x OBS_COLS
+# cells of GRID_SIZE around the player, one plane per channel below. Rows run
+# from OBS_AHEAD rows ahead of the player (row 0) to OBS_BEHIND rows behind;
+# columns are centered on the player's x, so the grid moves with them.
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from crossy_core import *
+
+OBS_AHEAD = 8
+OBS_BEHIND = 3
+OBS_HALF_WIDTH = 6  # columns on each side of the player's
+OBS_ROWS = OBS_AHEAD + 1 + OBS_BEHIND
+OBS_COLS = OBS_HALF_WIDTH * 2 + 1
+
+# Observation channels
+HAZARD = 0  # cells overlapped by a car, enemy or running train
+LOG = 1  # cells overlapped by a log
+WATER = 2  # every cell of a river lane
+WARNING = 3  # every cell of a train lane whose train is about to run
+WALL = 4  # cells the player cannot move into, beyond the screen edges
+CHANNELS = 5
+
+TRAIN_WARNING = 60  # ticks of cooldown left when the crossing starts flashing
+
+class VectorEnv:
+    def __init__(self, num_worlds, character=Character.CHICKEN, environment=Environment.CITY, seed=None,
+                 lane_weights=LANE_WEIGHTS, max_steps=FPS * 60 * 10, death_penalty=1.0):
+        self.num_worlds = num_worlds
+        self.max_steps = max_steps  # episodes are cut off (truncated) after this many ticks
+        self.death_penalty = death_penalty
+        self.rng = random.Random(seed)  # draws the seed of every episode
+        self.worlds = [World(character, environment, seed=self.rng.getrandbits(64), lane_weights=lane_weights)
+                       for _ in range(num_worlds)]
+        self.obs = np.zeros((num_worlds, CHANNELS, OBS_ROWS, OBS_COLS), dtype=np.uint8)
+    
+    def reset(self):
+        for world in self.worlds:
+            world.init_game(self.rng.getrandbits(64))
+        for i, world in enumerate(self.worlds):
+            self.observe(i, world)
+        return self.obs.copy()
+    
+    def step(self, actions):
+        # One tick of every world. Rewards are the rows gained, minus
+        # death_penalty on the tick a world dies. The observations of worlds
+        # that finished are already those of their next episode; info has
+        # the finished episode's score and length and whether it was cut off.
+        rewards = np.zeros(self.num_worlds, dtype=np.float32)
+        dones = np.zeros(self.num_worlds, dtype=np.bool_)
+        scores = np.zeros(self.num_worlds, dtype=np.int64)
+        ticks = np.zeros(self.num_worlds, dtype=np.int64)
+        truncated = np.zeros(self.num_worlds, dtype=np.bool_)
+        
+        for i, (world, action) in enumerate(zip(self.worlds, np.asarray(actions).tolist())):
+            score = world.score
+            world.step(MOVES[action])
+            rewards[i] = world.score - score
+            if world.game_over:
+                rewards[i] -= self.death_penalty
+            elif world.tick < self.max_steps:
+                self.observe(i, world)
+                continue
+            
+            dones[i] = True
+            scores[i] = world.score
+            ticks[i] = world.tick
+            truncated[i] = not world.game_over
+            world.init_game(self.rng.getrandbits(64))
+            self.observe(i, world)
+        
+        info = {"score": scores, "ticks": ticks, "truncated": truncated}
+        return self.obs.copy(), rewards, dones, info
+    
+    def observe(self, i, world):
+        obs = self.obs[i]
+        obs.fill(0)
+        player = world.player
+        player_row = nearest_row(player.y)
+        left = player.x - OBS_HALF_WIDTH * GRID_SIZE  # left edge of column 0
+        
+        # Columns the player could not stand in
+        first = max(0, min(OBS_COLS, math.ceil(-left / GRID_SIZE)))
+        last = max(0, min(OBS_COLS, math.floor((SCREEN_WIDTH - player.width - left) / GRID_SIZE) + 1))
+        obs[WALL, :, :first] = 1
+        obs[WALL, :, last:] = 1
+        
+        for r in range(OBS_ROWS):
+            lane = world.lanes.lane_at(player_row + OBS_AHEAD - r)
+            if lane is None:
+                continue
+            if lane.lane_type == LaneType.RIVER:
+                obs[WATER, r] = 1
+                channel = LOG
+            else:
+                channel = HAZARD
+            if lane.lane_type == LaneType.TRAIN and 0 < lane.train_cooldown < TRAIN_WARNING:
+                obs[WARNING, r] = 1
+            
+            for obj in lane.objects:
+                if lane.lane_type == LaneType.TRAIN and not obj.active:
+                    continue
+                # Columns overlapped by the object's collision rect
+                x = int(obj.x)
+                lo = max(0, math.floor((x - left) / GRID_SIZE))
+                hi = min(OBS_COLS, math.ceil((x + obj.rect_width - left) / GRID_SIZE))
+                if lo < hi:
+                    obs[channel, r, lo:hi] = 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure VectorEnv throughput with random actions.")
+    parser.add_argument("--worlds", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=2000, help="steps of the whole batch")
+    parser.add_argument("--environment", choices=[env.name for env in Environment], default="CITY")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    env = VectorEnv(args.worlds, environment=Environment[args.environment], seed=args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    episodes = 0
+    total_score = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        obs, rewards, dones, info = env.step(rng.integers(len(MOVES), size=args.worlds))
+        episodes += int(dones.sum())
+        total_score += int(info["score"][dones].sum())
+    elapsed = time.perf_counter() - start
+    world_steps = args.steps * args.worlds
+    print(f"{world_steps:,} world steps in {elapsed:.2f}s ({world_steps / elapsed:,.0f} steps/s), "
+          f"{episodes} episodes, mean score {total_score / episodes if episodes else 0.0:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Frame profiler: wall-clock time per phase of each frame, with rolling
+# percentiles over the last few seconds and CSV/JSON dumps.
+#
+# Phases are recorded as laps: mark(phase) charges the time since the previous
+# mark to phase, so the marks placed through Game.run and World.step cover the
+# whole frame without nested timers.
+import csv
+import json
+import time
+from collections import deque
+
+PHASES = (
+    "events",
+    "handle_input",
+    "player.update",
+    "lanes.update",
+    "check_collisions",
+    "update_camera",
+    "update_lanes",
+    "draw_game",
+    "overlay",
+    "display.flip",
+)
+PERCENTILES = (50, 95, 99)
+
+class FrameProfiler:
+    def __init__(self, window=600):
+        self.frames = deque(maxlen=window)  # {phase: seconds} per frame, plus "frame"
+        self.count = 0  # frames recorded, including those dropped from the window
+        self.current = {}
+        self.frame_start = 0.0
+        self.last = 0.0
+
+    def begin_frame(self):
+        self.current = {}
+        self.frame_start = self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def end_frame(self):
+        self.current["frame"] = time.perf_counter() - self.frame_start
+        self.frames.append(self.current)
+        self.count += 1
+
+    def percentiles(self):
+        # {phase: {"p50": ms, "p95": ms, "p99": ms}} over the rolling window
+        summary = {}
+        for phase in PHASES + ("frame",):
+            values = sorted(frame.get(phase, 0.0) * 1000 for frame in self.frames)
+            if values:
+                summary[phase] = {f"p{p}": values[min(len(values) - 1, len(values) * p // 100)]
+                                  for p in PERCENTILES}
+        return summary
+
+    def dump_csv(self, path):
+        # One row per frame in the window, times in milliseconds
+        columns = PHASES + ("frame",)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for frame in self.frames:
+                writer.writerow([f"{frame.get(phase, 0.0) * 1000:.4f}" for phase in columns])
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"frames": len(self.frames), "milliseconds": self.percentiles()}, f, indent=2)
@@ -0,0 +1,487 @@
+# Pygame drawing for crossy_core worlds: baked lane backgrounds, the sprite
+# atlas and per-entity shapes.
+import math
+import pygame
+from collections import OrderedDict
+
+from crossy_core import *
+
+# Sprite atlas
+USE_SPRITE_ATLAS = True  # False draws every sprite from primitives each frame
+SPRITE_ATLAS_SIZE = 256  # sprites kept before the least recently used is evicted
+SPRITE_MARGIN = 20  # room around an entity's rect for parts drawn outside it
+USE_SCROLL_BUFFER = True  # False redraws every lane background each frame
+
+# Size of the render target relative to the world's SCREEN_WIDTH x SCREEN_HEIGHT
+# pixels; set through set_render_scale. World coordinates are unchanged, only
+# drawing is scaled, mostly by baking sprites and lane strips at this size.
+render_scale = 1.0
+
+def scaled(value):
+    return round(value * render_scale)
+
+def scaled_rect(x, y, width, height):
+    return pygame.Rect(scaled(x), scaled(y), scaled(width), scaled(height))
+
+def render_size():
+    return (scaled(SCREEN_WIDTH), scaled(SCREEN_HEIGHT))
+
+def scale_surface(surface):
+    # A surface drawn at world size, resized to the render scale
+    if render_scale == 1:
+        return surface
+    width, height = surface.get_size()
+    return pygame.transform.smoothscale(surface, (max(1, scaled(width)), max(1, scaled(height))))
+
+def car_sprite_key(car):
+    return ("car", car.car_type, car.width, car.direction, car.color)
+
+def draw_car_shape(surface, car, x, y):
+    if car.car_type == "car":
+        # Car body
+        pygame.draw.rect(surface, car.color, 
+                       (x, y, car.width, car.height))
+        # Windows
+        pygame.draw.rect(surface, SKY_BLUE, 
+                       (x + 10, y + 5, car.width - 50, car.height - 15))
+        # Headlights
+        light_x = x + car.width - 5 if car.direction > 0 else x + 5
+        pygame.draw.circle(surface, YELLOW, (light_x, y + car.height // 2), 3)
+    elif car.car_type == "bus":
+        # Bus body
+        pygame.draw.rect(surface, car.color, 
+                       (x, y, car.width, car.height))
+        # Windows
+        for i in range(3):
+            pygame.draw.rect(surface, SKY_BLUE, 
+                           (x + 10 + i * 20, y + 5, 15, car.height - 15))
+
+def log_sprite_key(log):
+    return ("log", log.width)
+
+def draw_log_shape(surface, log, x, y):
+    # Log body
+    pygame.draw.rect(surface, BROWN, 
+                   (x, y, log.width, log.height))
+    # Log rings
+    for i in range(0, log.width, 20):
+        pygame.draw.circle(surface, (101, 67, 33), 
+                         (x + i + 10, y + log.height // 2), 8)
+
+def train_sprite_key(train):
+    return ("train", train.direction)
+
+def draw_train_shape(surface, train, x, y):
+    # Train engine
+    pygame.draw.rect(surface, RED, 
+                   (x, y, train.width, train.height))
+    # Train windows
+    for i in range(5):
+        pygame.draw.rect(surface, YELLOW, 
+                       (x + 10 + i * 40, y + 5, 30, train.height - 15))
+    # Front light
+    if train.direction > 0:
+        pygame.draw.circle(surface, YELLOW, 
+                         (x + train.width - 10, y + train.height // 2), 8)
+    else:
+        pygame.draw.circle(surface, YELLOW, 
+                         (x + 10, y + train.height // 2), 8)
+
+def enemy_sprite_key(enemy):
+    return ("enemy", enemy.enemy_type)
+
+def draw_enemy_shape(surface, enemy, x, y):
+    if enemy.enemy_type == "robot":
+        # Robot body
+        pygame.draw.rect(surface, GRAY, 
+                       (x, y + 10, enemy.width, enemy.height - 10))
+        # Robot head
+        pygame.draw.rect(surface, DARK_GRAY, 
+                       (x + 5, y, enemy.width - 10, 15))
+        # Robot eyes
+        pygame.draw.circle(surface, RED, 
+                         (x + 10, y + 7), 3)
+        pygame.draw.circle(surface, RED, 
+                         (x + enemy.width - 10, y + 7), 3)
+    elif enemy.enemy_type == "alien":
+        # Alien body
+        pygame.draw.ellipse(surface, GREEN, 
+                          (x, y + 10, enemy.width, enemy.height - 10))
+        # Alien head
+        pygame.draw.ellipse(surface, DARK_GREEN, 
+                          (x + 5, y, enemy.width - 10, 20))
+        # Alien eyes
+        pygame.draw.circle(surface, BLACK, 
+                         (x + 10, y + 8), 4)
+        pygame.draw.circle(surface, BLACK, 
+                         (x + enemy.width - 10, y + 8), 4)
+
+def player_sprite_key(player):
+    return ("player", player.character)
+
+def draw_player_shape(surface, player, x, y):
+    if player.character == Character.CHICKEN:
+        # Chicken body
+        pygame.draw.ellipse(surface, WHITE, 
+                          (x, y + 10, player.width, player.height - 10))
+        # Chicken head
+        pygame.draw.circle(surface, WHITE, 
+                         (x + player.width // 2, y + 8), 8)
+        # Beak
+        points = [(x + player.width // 2, y + 8),
+                 (x + player.width // 2 + 8, y + 10),
+                 (x + player.width // 2, y + 12)]
+        pygame.draw.polygon(surface, ORANGE, points)
+        # Eyes
+        pygame.draw.circle(surface, BLACK, 
+                         (x + player.width // 2 - 3, y + 6), 2)
+    
+    elif player.character == Character.ANDROID:
+        # Android body
+        pygame.draw.rect(surface, (164, 198, 57), 
+                       (x, y + 12, player.width, player.height - 12))
+        # Android head
+        pygame.draw.circle(surface, (164, 198, 57), 
+                         (x + player.width // 2, y + 10), 10)
+        # Antennae
+        pygame.draw.line(surface, (164, 198, 57), 
+                       (x + player.width // 2 - 5, y + 3),
+                       (x + player.width // 2 - 8, y), 3)
+        pygame.draw.line(surface, (164, 198, 57), 
+                       (x + player.width // 2 + 5, y + 3),
+                       (x + player.width // 2 + 8, y), 3)
+        pygame.draw.circle(surface, (164, 198, 57), 
+                         (x + player.width // 2 - 8, y), 2)
+        pygame.draw.circle(surface, (164, 198, 57), 
+                         (x + player.width // 2 + 8, y), 2)
+        # Eyes
+        pygame.draw.circle(surface, WHITE, 
+                         (x + player.width // 2 - 4, y + 10), 3)
+        pygame.draw.circle(surface, WHITE, 
+                         (x + player.width // 2 + 4, y + 10), 3)
+    
+    elif player.character == Character.BRITISH_GUARD:
+        # Guard body (red uniform)
+        pygame.draw.rect(surface, RED, 
+                       (x, y + 15, player.width, player.height - 15))
+        # Guard head (beige)
+        pygame.draw.circle(surface, (255, 228, 196), 
+                         (x + player.width // 2, y + 12), 8)
+        # Hat (black bearskin)
+        pygame.draw.rect(surface, BLACK, 
+                       (x + 5, y, player.width - 10, 10))
+        # Eyes
+        pygame.draw.circle(surface, BLACK, 
+                         (x + player.width // 2 - 3, y + 12), 2)
+        pygame.draw.circle(surface, BLACK, 
+                         (x + player.width // 2 + 3, y + 12), 2)
+    
+    elif player.character == Character.SNOWMAN:
+        # Snowman bottom
+        pygame.draw.circle(surface, SNOW_WHITE, 
+                         (x + player.width // 2, y + 25), 12)
+        # Snowman middle
+        pygame.draw.circle(surface, SNOW_WHITE, 
+                         (x + player.width // 2, y + 15), 9)
+        # Snowman head
+        pygame.draw.circle(surface, SNOW_WHITE, 
+                         (x + player.width // 2, y + 7), 7)
+        # Eyes
+        pygame.draw.circle(surface, BLACK, 
+                         (x + player.width // 2 - 3, y + 6), 2)
+        pygame.draw.circle(surface, BLACK, 
+                         (x + player.width // 2 + 3, y + 6), 2)
+        # Carrot nose
+        points = [(x + player.width // 2, y + 8),
+                 (x + player.width // 2 + 8, y + 9),
+                 (x + player.width // 2, y + 10)]
+        pygame.draw.polygon(surface, ORANGE, points)
+
+# Sprite key and shape drawing function for each entity class
+SHAPES = {
+    Car: (car_sprite_key, draw_car_shape),
+    Log: (log_sprite_key, draw_log_shape),
+    Train: (train_sprite_key, draw_train_shape),
+    Enemy: (enemy_sprite_key, draw_enemy_shape),
+    Player: (player_sprite_key, draw_player_shape),
+}
+
+class SpriteAtlas:
+    # Entities baked once into alpha surfaces, keyed by their SHAPES sprite key
+    def __init__(self, max_sprites=SPRITE_ATLAS_SIZE):
+        self.max_sprites = max_sprites
+        self.enabled = USE_SPRITE_ATLAS
+        self.sprites = OrderedDict()
+    
+    def get(self, entity):
+        sprite_key, draw_shape = SHAPES[type(entity)]
+        key = sprite_key(entity)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((entity.width + SPRITE_MARGIN * 2,
+                                     entity.height + SPRITE_MARGIN * 2), pygame.SRCALPHA).convert_alpha()
+            draw_shape(sprite, entity, SPRITE_MARGIN, SPRITE_MARGIN)
+            sprite = scale_surface(sprite)
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.max_sprites:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return sprite
+    
+    def draw(self, screen, entity, x, y):
+        # Returns the screen area the sprite can cover; x and y are in world
+        # pixels. Shapes can only be drawn immediately at the world's size.
+        if self.enabled or render_scale != 1:
+            sprite = self.get(entity)
+            left, top = scaled(x - SPRITE_MARGIN), scaled(y - SPRITE_MARGIN)
+            screen.blit(sprite, (left, top))
+            return pygame.Rect(left, top, sprite.get_width(), sprite.get_height())
+        SHAPES[type(entity)][1](screen, entity, x, y)
+        return pygame.Rect(x - SPRITE_MARGIN, y - SPRITE_MARGIN,
+                           entity.width + SPRITE_MARGIN * 2, entity.height + SPRITE_MARGIN * 2)
+
+sprite_atlas = SpriteAtlas()
+
+def draw_lane_background(surface, lane_type, environment):
+    # Draw the static part of a lane onto a GRID_SIZE tall strip
+    if lane_type == LaneType.SAFE:
+        if environment == Environment.SNOW:
+            color = (230, 240, 255)  # Light ice blue instead of white
+            pattern_color = (180, 200, 220)  # Darker ice blue for pattern
+        elif environment == Environment.VILLAGE:
+            color = VILLAGE_GREEN
+            pattern_color = DARK_GREEN
+        elif environment == Environment.TECH:
+            color = LIGHT_GRAY
+            pattern_color = GRAY
+        else:
+            color = GREEN
+            pattern_color = DARK_GREEN
+        pygame.draw.rect(surface, color, (0, 0, SCREEN_WIDTH, GRID_SIZE))
+        # Add pattern (grass or snow texture)
+        for i in range(0, SCREEN_WIDTH, 20):
+            pygame.draw.circle(surface, pattern_color, (i, 10), 3)
+    elif lane_type == LaneType.ROAD:
+        pygame.draw.rect(surface, DARK_GRAY, (0, 0, SCREEN_WIDTH, GRID_SIZE))
+        # Road lines
+        for i in range(0, SCREEN_WIDTH, 40):
+            pygame.draw.rect(surface, YELLOW, (i, GRID_SIZE // 2 - 2, 20, 4))
+    elif lane_type == LaneType.RIVER:
+        if environment == Environment.SNOW:
+            color = ICE_BLUE
+        else:
+            color = BLUE
+        pygame.draw.rect(surface, color, (0, 0, SCREEN_WIDTH, GRID_SIZE))
+        # Water waves
+        for i in range(0, SCREEN_WIDTH, 30):
+            pygame.draw.arc(surface, DARK_BLUE, 
+                          (i, 10, 20, 20), 0, 3.14, 2)
+    elif lane_type == LaneType.TRAIN:
+        pygame.draw.rect(surface, DARK_GRAY, (0, 0, SCREEN_WIDTH, GRID_SIZE))
+        # Train tracks
+        pygame.draw.rect(surface, BROWN, (0, 10, SCREEN_WIDTH, 5))
+        pygame.draw.rect(surface, BROWN, (0, 25, SCREEN_WIDTH, 5))
+    elif lane_type == LaneType.DANGER:
+        pygame.draw.rect(surface, PURPLE, (0, 0, SCREEN_WIDTH, GRID_SIZE))
+        # Danger pattern
+        for i in range(0, SCREEN_WIDTH, 40):
+            points = [(i, 0), (i + 20, 20), (i, 40)]
+            pygame.draw.polygon(surface, (255, 0, 255), points, 2)
+
+class LaneBackgroundCache:
+    # Pre-rendered lane background strips keyed by (LaneType, Environment)
+    def __init__(self):
+        self.surfaces = {}
+        self.environment = None
+    
+    def set_environment(self, environment):
+        # Strips of the previous environment are no longer needed
+        if environment != self.environment:
+            self.surfaces.clear()
+            self.environment = environment
+    
+    def get(self, lane_type, environment):
+        key = (lane_type, environment)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((SCREEN_WIDTH, GRID_SIZE)).convert()
+            draw_lane_background(surface, lane_type, environment)
+            surface = scale_surface(surface)
+            self.surfaces[key] = surface
+        return surface
+
+lane_backgrounds = LaneBackgroundCache()
+
+def background_color(environment):
+    if environment == Environment.SNOW:
+        return (200, 220, 240)  # Light winter sky blue
+    elif environment == Environment.VILLAGE:
+        return VILLAGE_GREEN
+    elif environment == Environment.TECH:
+        return DARK_GRAY
+    return SKY_BLUE
+
+class ScrollingBackground:
+    # Lane backgrounds around the camera, kept in a ring of GRID_SIZE tall
+    # slots, one row per slot. The camera only moves vertically, so a row is
+    # painted once when it scrolls into view and a frame's background is one
+    # or two blits out of the ring.
+    def __init__(self):
+        self.rows = -(-SCREEN_HEIGHT // GRID_SIZE) + 1  # rows a screen can overlap
+        self.surface = None
+        self.painted = {}  # slot -> (row, lane type, environment) painted there
+    
+    def paint(self, world, row):
+        lane = world.lanes.lane_at(row)
+        key = (row, lane.lane_type if lane else None, world.environment)
+        slot = -row % self.rows
+        if self.painted.get(slot) != key:
+            strip = scaled(GRID_SIZE)
+            if lane:
+                self.surface.blit(lane_backgrounds.get(lane.lane_type, lane.environment), (0, slot * strip))
+            else:
+                self.surface.fill(background_color(world.environment), (0, slot * strip, scaled(SCREEN_WIDTH), strip))
+            self.painted[slot] = key
+    
+    def draw(self, screen, world, camera_y):
+        width, height = render_size()
+        strip = scaled(GRID_SIZE)
+        if self.surface is None or self.surface.get_height() != self.rows * strip:
+            self.surface = pygame.Surface((width, self.rows * strip)).convert()
+            self.painted.clear()
+        top = math.ceil(camera_y)  # lanes are drawn at int(y - camera_y)
+        
+        # Rows overlapping the screen, from the bottom edge up to the top edge
+        for row in range(math.ceil((ORIGIN_Y - top - SCREEN_HEIGHT + 1) / GRID_SIZE),
+                         math.ceil((ORIGIN_Y - top) / GRID_SIZE) + 1):
+            self.paint(world, row)
+        
+        # World y maps to (y - ORIGIN_Y) mod the ring's height in world pixels
+        offset = (top - ORIGIN_Y) % (self.rows * GRID_SIZE)
+        ring_y = offset // GRID_SIZE * strip + scaled(offset % GRID_SIZE)
+        first = min(height, self.rows * strip - ring_y)
+        screen.blit(self.surface, (0, 0), (0, ring_y, width, first))
+        if first < height:
+            screen.blit(self.surface, (0, first), (0, 0, width, height - first))
+
+world_background = ScrollingBackground()
+
+def set_render_scale(scale):
+    # Baked sprites and lane strips are rebuilt at the new size
+    global render_scale
+    render_scale = scale
+    sprite_atlas.sprites.clear()
+    lane_backgrounds.surfaces.clear()
+    world_background.painted.clear()
+
+class TextCache:
+    # Rendered HUD text per label slot, re-rendered only when the text changes,
+    # plus one pre-built translucent overlay for the game over screen
+    def __init__(self):
+        self.labels = {}
+        self.overlay_surface = None
+    
+    def render(self, slot, font, text, color):
+        entry = self.labels.get(slot)
+        if entry is None or entry[0] != (font, text, color):
+            entry = ((font, text, color), font.render(text, True, color))
+            self.labels[slot] = entry
+        return entry[1]
+    
+    def overlay(self):
+        if self.overlay_surface is None:
+            self.overlay_surface = pygame.Surface(render_size()).convert()
+            self.overlay_surface.set_alpha(128)
+            self.overlay_surface.fill(BLACK)
+        return self.overlay_surface
+
+def draw_entity(screen, obj, camera_y, lag=0.0):
+    # lag is the fraction of a tick to draw behind the current position;
+    # returns the drawn area, or None if the entity was culled
+    y_pos = int(obj.y - camera_y)
+    x = int(obj.x - obj.speed * obj.direction * lag)
+    if isinstance(obj, Train):
+        if -300 < y_pos < SCREEN_HEIGHT + 100 and obj.active:
+            return sprite_atlas.draw(screen, obj, x, y_pos)
+    elif -100 < y_pos < SCREEN_HEIGHT + 100:
+        return sprite_atlas.draw(screen, obj, x, y_pos)
+    return None
+
+def draw_lane(screen, lane, camera_y, lag=0.0, dirty=None, background=True):
+    # dirty, if given, collects the areas of everything that moves or blinks;
+    # background=False leaves the static strip to ScrollingBackground
+    y_pos = int(lane.y - camera_y)
+    
+    # Draw lane background
+    if -100 < y_pos < SCREEN_HEIGHT + 100:
+        if background:
+            screen.blit(lane_backgrounds.get(lane.lane_type, lane.environment), (0, scaled(y_pos)))
+        # Warning if train is coming
+        if lane.lane_type == LaneType.TRAIN and 0 < lane.train_cooldown < 60:
+            if (lane.train_cooldown // 10) % 2 == 0:
+                pygame.draw.circle(screen, RED, (scaled(20), scaled(y_pos + 20)), max(1, scaled(8)))
+                pygame.draw.circle(screen, RED, (scaled(SCREEN_WIDTH - 20), scaled(y_pos + 20)), max(1, scaled(8)))
+            if dirty is not None:
+                dirty.append(scaled_rect(12, y_pos + 12, 17, 17))
+                dirty.append(scaled_rect(SCREEN_WIDTH - 28, y_pos + 12, 17, 17))
+    
+    # Draw objects
+    for obj in lane.objects:
+        rect = draw_entity(screen, obj, camera_y, lag)
+        if rect and dirty is not None:
+            dirty.append(rect)
+
+def draw_player(screen, player, camera_y, x=None, y=None):
+    x = player.x if x is None else x
+    y = player.y if y is None else y
+    y_pos = int(y - camera_y)
+    hop_offset = -abs(player.hop_animation * 2) if player.is_hopping else 0
+    return sprite_atlas.draw(screen, player, int(x), y_pos + hop_offset)
+
+def lerp(a, b, alpha):
+    return a + (b - a) * alpha
+
+def draw_world(screen, world, alpha=1.0, dirty=None):
+    # alpha is how far rendering is between the previous tick and the current
+    # one; dirty, if given, collects the areas of moving entities and the player
+    camera_y = lerp(world.prev_camera_y, world.camera_y, alpha)
+    prev_x, prev_y = world.prev_player_pos
+    player_x = lerp(prev_x, world.player.x, alpha)
+    player_y = lerp(prev_y, world.player.y, alpha)
+    lag = 1.0 - alpha
+    if world.engine:
+        world.engine.sync_visible(camera_y)
+    
+    # Background
+    if USE_SCROLL_BUFFER:
+        world_background.draw(screen, world, camera_y)
+    else:
+        screen.fill(background_color(world.environment))
+    
+    # Draw lanes
+    for lane in world.lanes:
+        draw_lane(screen, lane, camera_y, lag, dirty, not USE_SCROLL_BUFFER)
+    
+    # Draw player
+    rect = draw_player(screen, world.player, camera_y, player_x, player_y)
+    if dirty is not None:
+        dirty.append(rect)
+
+def draw_profile(screen, text, font, summary):
+    # Panel of per-phase p50/p95/p99 milliseconds from FrameProfiler.percentiles();
+    # returns the panel's area
+    line_height = font.get_linesize()
+    rows = [("phase", ("p50", "p95", "p99"))]
+    rows += [(phase, tuple(f"{times[p]:.2f}" for p in ("p50", "p95", "p99"))) for phase, times in summary.items()]
+    panel = scaled_rect(SCREEN_WIDTH - 290, 10, 280, 10)
+    panel.height += line_height * len(rows)
+    screen.fill(BLACK, panel)
+    for i, (phase, columns) in enumerate(rows):
+        y = panel.y + scaled(5) + i * line_height
+        color = YELLOW if i == 0 else WHITE
+        screen.blit(text.render(("profile", i), font, phase, color), (panel.x + scaled(8), y))
+        for j, value in enumerate(columns):
+            label = text.render(("profile", i, j), font, value, color)
+            screen.blit(label, (panel.x + scaled(170 + j * 50) - label.get_width(), y))
+    return panel
@@ -0,0 +1,159 @@
+# Input recordings: the seed of a game plus the move made on every tick, which
+# replays the game exactly. Game records each game it plays and saves the
+# recording when the player dies; this plays recordings back at full speed.
+#
+#   python crossy_replay.py replays/*.crr
+#   python crossy_replay.py replays/20240101-120000-37-9e3779b97f4a7c15.crr --render-every 4
+#
+# Replaying reports whether each game ended with the recorded score, death
+# tick and cause (exit status 1 if any did not) and the ticks per second.
+#
+# File format, little-endian: header (magic, version, flags, character,
+# environment, seed, ticks, score, death cause), then the moves run-length
+# encoded one byte per run: the index into MOVES in the low bits and the run
+# length - 1 above them, so a recording is never larger than a byte per tick.
+import argparse
+import glob
+import struct
+import sys
+import time
+
+from crossy_core import *
+
+MAGIC = b"CRRP"
+VERSION = 2  # 2: rows are laid out as at tick 0
+HEADER = struct.Struct("<4sBBBBQIIB")
+CODE_BITS = 3
+MAX_RUN = 256 >> CODE_BITS
+FLAG_VECTOR = 1  # recorded with crossy_vector.VectorEngine
+NO_DEATH = 255
+
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+
+class Recording:
+    def __init__(self, seed, character, environment, vector=False):
+        self.seed = seed
+        self.character = character
+        self.environment = environment
+        self.vector = vector
+        self.inputs = bytearray()  # index into MOVES per tick
+        self.score = 0
+        self.death_cause = None
+    
+    @classmethod
+    def of(cls, world):
+        # Empty recording for the game world has just started
+        return cls(world.seed, world.character, world.environment, world.engine is not None)
+    
+    def record(self, move):
+        self.inputs.append(MOVE_CODES[move])
+    
+    def finish(self, world):
+        self.score = world.score
+        self.death_cause = world.death_cause
+    
+    def moves(self):
+        return [MOVES[code] for code in self.inputs]
+    
+    def to_bytes(self):
+        runs = bytearray()
+        i = 0
+        while i < len(self.inputs):
+            code = self.inputs[i]
+            end = i + 1
+            while end < len(self.inputs) and self.inputs[end] == code and end - i < MAX_RUN:
+                end += 1
+            runs.append(code | (end - i - 1) << CODE_BITS)
+            i = end
+        death = self.death_cause.value if self.death_cause else NO_DEATH
+        header = HEADER.pack(MAGIC, VERSION, FLAG_VECTOR if self.vector else 0, self.character.value,
+                             self.environment.value, self.seed, len(self.inputs), self.score, death)
+        return header + bytes(runs)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, flags, character, environment, seed, ticks, score, death = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a version %d recording" % VERSION)
+        recording = cls(seed, Character(character), Environment(environment), bool(flags & FLAG_VECTOR))
+        mask = (1 << CODE_BITS) - 1
+        for run in data[HEADER.size:]:
+            recording.inputs += bytes((run & mask,)) * ((run >> CODE_BITS) + 1)
+        if len(recording.inputs) != ticks:
+            raise ValueError("recording has %d ticks, header says %d" % (len(recording.inputs), ticks))
+        recording.score = score
+        recording.death_cause = LaneType(death) if death != NO_DEATH else None
+        return recording
+    
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+def play(recording, world=None, render_every=0):
+    # Replay onto world (a new World by default), as fast as possible; a Game
+    # can be passed to draw every render_every ticks
+    engine = None
+    if recording.vector:
+        from crossy_vector import VectorEngine
+        engine = VectorEngine()
+    if world is None:
+        world = World(recording.character, recording.environment, engine, recording.seed)
+    else:
+        world.character = recording.character
+        world.environment = recording.environment
+        world.engine = engine
+        world.init_game(recording.seed)
+    
+    if render_every:
+        import pygame
+    for tick, move in enumerate(recording.moves(), 1):
+        world.step(move)
+        if render_every and tick % render_every == 0:
+            world.present_game(1.0)
+            pygame.event.pump()
+    return world
+
+def matches(recording, world):
+    # Whether a replay ended the way the recorded game did: dead on the last
+    # tick with the same score and cause
+    return (world.game_over and world.tick == len(recording.inputs) and
+            world.score == recording.score and world.death_cause == recording.death_cause)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded Crossy Road games at full speed.")
+    parser.add_argument("paths", nargs="+", help="recordings, or glob patterns of them")
+    parser.add_argument("--render-every", type=int, default=0, metavar="N",
+                        help="draw every Nth tick in a window (0 replays headless)")
+    args = parser.parse_args(argv)
+    
+    game = None
+    if args.render_every:
+        from crossy_bench import load_game
+        game = load_game(headless=False)()
+        game.in_menu = False
+    
+    paths = [path for pattern in args.paths for path in sorted(glob.glob(pattern)) or [pattern]]
+    mismatches = 0
+    total_ticks = 0
+    start = time.perf_counter()
+    for path in paths:
+        recording = Recording.load(path)
+        world = play(recording, game, args.render_every)
+        total_ticks += world.tick
+        ok = matches(recording, world)
+        mismatches += not ok
+        cause = world.death_cause.name if world.death_cause else "-"
+        print(f"{path}: {world.tick} ticks, score {world.score}, death {cause}"
+              f"{'' if ok else '  MISMATCH (recorded score %d)' % recording.score}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths)} replays, {total_ticks:,} ticks in {elapsed:.2f}s "
+          f"({total_ticks / elapsed if elapsed else 0.0:,.0f} ticks/s)")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# Persistent high scores per character and environment, recent runs and death
+# causes. Files are written on a background thread through a temporary file
+# and an atomic rename, so saving never blocks a frame and a power cut leaves
+# either the old file or the new one, never a torn one.
+import json
+import os
+import sys
+import threading
+import time
+
+STATS_PATH = "crossy_stats.json"
+MAX_RUNS = 500  # most recent runs kept in the history
+
+def write_atomic(path, data):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class BackgroundWriter:
+    # Writes files on a daemon thread. write() only queues a callable that
+    # produces the file's bytes; a newer write to a path still waiting
+    # replaces the older one, so bursts of saves cost one write.
+    def __init__(self):
+        self.pending = {}  # path -> callable returning bytes, oldest first
+        self.condition = threading.Condition()
+        self.thread = None
+        self.closing = False
+    
+    def write(self, path, produce):
+        with self.condition:
+            self.pending[path] = produce
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="crossy-writer", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+    
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closing:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                path = next(iter(self.pending))
+                produce = self.pending.pop(path)
+            try:
+                write_atomic(path, produce())
+            except OSError as error:
+                print(f"Could not save {path}: {error}", file=sys.stderr)
+    
+    def close(self):
+        # Finish the queued writes, then stop the thread
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+def stats_key(character, environment):
+    return f"{character.name}/{environment.name}"
+
+class StatsStore:
+    # The file is read on first use, not at startup
+    def __init__(self, path=STATS_PATH, writer=None):
+        self.path = path
+        self.writer = writer if writer is not None else BackgroundWriter()
+        self.lock = threading.Lock()  # the writer thread serializes while the game records
+        self._data = None
+    
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self.load()
+        return self._data
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except (OSError, ValueError) as error:
+            print(f"Ignoring unreadable {self.path}: {error}", file=sys.stderr)
+            data = {}
+        data.setdefault("high_scores", {})  # "CHARACTER/ENVIRONMENT" -> score
+        data.setdefault("death_causes", {})  # environment name -> {lane type name: deaths}
+        data.setdefault("runs", [])
+        return data
+    
+    def high_score(self, character, environment):
+        with self.lock:
+            return self.data["high_scores"].get(stats_key(character, environment), 0)
+    
+    def record_run(self, world):
+        # Add a finished game and save in the background
+        key = stats_key(world.character, world.environment)
+        cause = world.death_cause.name if world.death_cause else None
+        with self.lock:
+            data = self.data
+            data["high_scores"][key] = max(data["high_scores"].get(key, 0), world.score)
+            if cause:
+                causes = data["death_causes"].setdefault(world.environment.name, {})
+                causes[cause] = causes.get(cause, 0) + 1
+            data["runs"].append({
+                "time": round(time.time()),
+                "character": world.character.name,
+                "environment": world.environment.name,
+                "seed": world.seed,
+                "score": world.score,
+                "ticks": world.tick,
+                "death_cause": cause,
+            })
+            del data["runs"][:-MAX_RUNS]
+        self.writer.write(self.path, self.dump)
+    
+    def dump(self):
+        with self.lock:
+            return json.dumps(self.data, separators=(",", ":")).encode()
@@ -0,0 +1,145 @@
+# Optional NumPy entity engine: advances the cars, logs and enemies of the
+# lanes near the screen in one batched operation per tick instead of calling
+# Lane.update on each lane: World(engine=VectorEngine()).
+#
+# The engine takes over the lanes the per-object path would update, the
+# spawned lanes within World.active_margin of the screen. Their positions
+# live in the arrays and are only written back to the objects when something
+# reads them: the rows the player collides with every tick, the visible rows
+# when drawing, a snapshot, or a lane leaving the band. Trains, one per train
+# lane, keep running through Lane.update.
+#
+# Lanes join the band through World.catch_up, exactly as on the per-object
+# path, and the batched update is GameObject.update's arithmetic, so
+# positions match that path bit for bit (test_vector.py checks this).
+import numpy as np
+
+from crossy_core import SCREEN_HEIGHT, SCREEN_WIDTH, LaneType
+
+class VectorEngine:
+    def __init__(self):
+        self.tick = 0  # world tick the arrays are at
+        self.active = []  # World.active_lanes() the last step, spawned only
+        self.lanes = []  # lanes taken over, in array order
+        self.slots = {}  # lane -> index into lanes
+        self.trains = []  # the train lanes among them
+        self.objects = []  # their other objects, lane by lane
+        self.starts = [0]  # first array row of each lane, plus the end
+        self.x = np.zeros(0)
+        self.velocity = np.zeros(0)  # speed * direction, what GameObject.update adds
+        self.high = np.zeros(0)  # objects moving right wrap above this...
+        self.low = np.zeros(0)  # ...and objects moving left below this
+        self.wrap_to = np.zeros(0)
+    
+    def step(self, world):
+        # One tick of the lanes near the screen; world.tick is the new tick
+        lanes = [lane for lane in world.active_lanes() if lane.spawned]
+        entering = []
+        if lanes != self.active:
+            entering = self.take(lanes)
+            self.active = lanes
+        
+        x = self.x
+        x += self.velocity
+        np.copyto(x, self.wrap_to, where=(x > self.high) | (x < self.low))
+        self.tick = world.tick
+        for lane in self.trains:
+            world.catch_up(lane)
+        
+        # Lanes new to the band join already up to date
+        if entering:
+            for lane in entering:
+                world.catch_up(lane)
+            self.add(entering)
+    
+    def take(self, lanes):
+        # Write back and let go of the lanes not in lanes, keep the rest;
+        # returns the lanes still to be added
+        wanted = set(lanes)
+        keep = []
+        for i, lane in enumerate(self.lanes):
+            if lane in wanted:
+                keep.append(i)
+            else:
+                self.sync_lane(i)
+        
+        if len(keep) < len(self.lanes):
+            starts = self.starts
+            rows = [row for i in keep for row in range(starts[i], starts[i + 1])]
+            for name in ("x", "velocity", "high", "low", "wrap_to"):
+                setattr(self, name, getattr(self, name)[rows])
+            self.objects = [self.objects[row] for row in rows]
+            self.lanes = [self.lanes[i] for i in keep]
+            self.starts = [0]
+            for i in keep:
+                self.starts.append(self.starts[-1] + starts[i + 1] - starts[i])
+            self.slots = {lane: i for i, lane in enumerate(self.lanes)}
+            self.trains = [lane for lane in self.trains if lane in wanted]
+        return [lane for lane in lanes if lane not in self.slots]
+    
+    def add(self, lanes):
+        # Append the rows of lanes whose objects are current at self.tick
+        rows = []
+        for lane in lanes:
+            self.slots[lane] = len(self.lanes)
+            self.lanes.append(lane)
+            if lane.lane_type == LaneType.TRAIN:
+                self.trains.append(lane)
+            else:
+                for obj in lane.objects:
+                    self.objects.append(obj)
+                    forward = obj.direction > 0
+                    rows.append((obj.x, obj.speed * obj.direction,
+                                 SCREEN_WIDTH if forward else np.inf,
+                                 -np.inf if forward else -obj.width,
+                                 -obj.width if forward else SCREEN_WIDTH))
+            self.starts.append(len(self.objects))
+        if rows:
+            columns = np.array(rows, dtype=np.float64).T
+            for name, column in zip(("x", "velocity", "high", "low", "wrap_to"), columns):
+                setattr(self, name, np.concatenate([getattr(self, name), column]))
+    
+    def holds(self, lane):
+        return lane in self.slots
+    
+    def holds_all(self, lanes):
+        # Whether lanes, in order, are the lanes taken over at the last step
+        return lanes == self.active
+    
+    def sync_lane(self, i):
+        # Write lane i's positions back onto its objects, if they are behind
+        lane = self.lanes[i]
+        if lane.tick == self.tick:
+            return
+        start, stop = self.starts[i], self.starts[i + 1]
+        for obj, x in zip(self.objects[start:stop], self.x[start:stop].tolist()):
+            obj.x = x
+        lane.tick = self.tick
+        lane.reindex()
+    
+    def sync_lanes(self, lanes):
+        for lane in lanes:
+            i = self.slots.get(lane)
+            if i is not None:
+                self.sync_lane(i)
+    
+    def sync_visible(self, camera_y):
+        # The lanes that can be drawn: trains up to 300 pixels above the
+        # screen, everything else up to 100 around it
+        for i, lane in enumerate(self.lanes):
+            if camera_y - 300 < lane.y < camera_y + SCREEN_HEIGHT + 100:
+                self.sync_lane(i)
+    
+    def sync(self):
+        for i in range(len(self.lanes)):
+            self.sync_lane(i)
+    
+    def invalidate(self):
+        # Write everything back and let go of every lane, before the lanes
+        # are changed behind the engine's back; the next step takes them over again
+        self.sync()
+        self.clear()
+    
+    def clear(self):
+        # Let go of every lane without writing back, when they are thrown away
+        self.__init__()